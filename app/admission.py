@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict
+
+from app.config import (
+    ADMISSION_API_KEY_BURST,
+    ADMISSION_API_KEY_RATE,
+    ADMISSION_MAX_INFLIGHT,
+    ADMISSION_MAX_LLM_CALLS,
+    ADMISSION_SESSION_BURST,
+    ADMISSION_SESSION_RATE,
+    ADMISSION_SESSION_REJECT_FACTOR,
+)
+
+MAX_TRACKED_KEYS = 100_000
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float) -> None:
+        self.tokens = capacity
+        self.updated = now
+
+
+class RateLimiter:
+    """Token buckets keyed by session or API key. A rate of 0 disables the limit."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_TRACKED_KEYS) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.burst, now)
+                # The least recently seen bucket has refilled the longest, so
+                # dropping it is the closest to forgetting a full bucket.
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens < 1.0:
+                return False
+            bucket.tokens -= 1.0
+            return True
+
+
+class ConcurrencyLimit:
+    """Non-blocking slot counter. A limit of 0 disables it."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit > 0 and self.in_use >= self.limit:
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+
+API_KEY_LIMITER = RateLimiter(ADMISSION_API_KEY_RATE, ADMISSION_API_KEY_BURST)
+SESSION_LIMITER = RateLimiter(ADMISSION_SESSION_RATE, ADMISSION_SESSION_BURST)
+# /honeypot has a single API key, so its bucket is a global cap; this keeps one
+# flooding session from draining it for everyone else.
+SESSION_REJECT_LIMITER = RateLimiter(
+    ADMISSION_SESSION_RATE * ADMISSION_SESSION_REJECT_FACTOR,
+    ADMISSION_SESSION_BURST * ADMISSION_SESSION_REJECT_FACTOR,
+)
+LLM_SLOTS = ConcurrencyLimit(ADMISSION_MAX_LLM_CALLS)
+REQUEST_SLOTS = ConcurrencyLimit(ADMISSION_MAX_INFLIGHT)
+
+COUNTERS: Counter = Counter()
+_COUNTERS_LOCK = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _COUNTERS_LOCK:
+        COUNTERS[name] += 1
+
+
+def admit_api_key(api_key: str) -> bool:
+    if API_KEY_LIMITER.allow(api_key):
+        return True
+    _count("rejectedApiKeyRate")
+    return False
+
+
+def admit_session(session_id: str) -> bool:
+    if SESSION_REJECT_LIMITER.allow(session_id):
+        return True
+    _count("rejectedSessionRate")
+    return False
+
+
+def enter_request() -> bool:
+    if REQUEST_SLOTS.try_acquire():
+        _count("admitted")
+        return True
+    _count("rejectedOverloaded")
+    return False
+
+
+def exit_request() -> None:
+    REQUEST_SLOTS.release()
+
+
+def acquire_llm(session_id: str) -> bool:
+    """Decide whether this turn may call the LLM; release_llm() must follow a True."""
+    if not SESSION_LIMITER.allow(session_id):
+        _count("degradedSessionRate")
+        return False
+    if not LLM_SLOTS.try_acquire():
+        _count("degradedLlmBusy")
+        return False
+    _count("llmCalls")
+    return True
+
+
+def release_llm() -> None:
+    LLM_SLOTS.release()
+
+
+def admission_stats() -> Dict:
+    with _COUNTERS_LOCK:
+        counters = dict(COUNTERS)
+    return {
+        "counters": counters,
+        "inFlightRequests": REQUEST_SLOTS.in_use,
+        "inFlightLlmCalls": LLM_SLOTS.in_use,
+        "policies": {
+            "apiKeyRate": API_KEY_LIMITER.rate,
+            "apiKeyBurst": API_KEY_LIMITER.burst,
+            "sessionRate": SESSION_LIMITER.rate,
+            "sessionBurst": SESSION_LIMITER.burst,
+            "sessionRejectRate": SESSION_REJECT_LIMITER.rate,
+            "sessionRejectBurst": SESSION_REJECT_LIMITER.burst,
+            "maxLlmCalls": LLM_SLOTS.limit,
+            "maxInFlightRequests": REQUEST_SLOTS.limit,
+        },
+    }
@@ -1,8 +1,28 @@
+import logging
 import random
-from typing import Dict, List
+import re
+from typing import Callable, List, Optional
 
 from google import genai
 from app.config import GEMINI_API_KEY
+from app.memory import Message, Session
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = "gemini-flash-lite-latest"
+
+# A sentence only counts as complete once its terminator is followed by
+# whitespace, so a chunk ending mid-number ("3.") or mid-URL is not cut early.
+SENTENCE_END_REGEX = re.compile(r"[.!?\u0964]+[\"')\]]*\s")
+# A period after one of these, after a single letter, or inside a dotted
+# abbreviation ("p.m.", "U.P.") does not end the sentence; splitting there
+# would send "Rs." or "Mr." to the scammer on its own.
+ABBREVIATIONS = {
+    "rs", "mr", "mrs", "ms", "dr", "sr", "jr", "st", "vs", "approx", "govt", "dept", "ltd", "pvt", "ref",
+}
+
+# Client used instead of a real Gemini client when set, e.g. a fake stream.
+_client_override: Optional[object] = None
 
 SYSTEM_PROMPT = (
     "You are a realistic Indian user replying to a suspected scammer. "
@@ -14,6 +34,35 @@ SYSTEM_PROMPT = (
 )
 
 
+def set_llm_client(client: Optional[object]) -> None:
+    global _client_override
+    _client_override = client
+
+
+def resolve_llm_client(client: Optional[object] = None) -> Optional[object]:
+    if client is not None:
+        return client
+    if _client_override is not None:
+        return _client_override
+    if GEMINI_API_KEY:
+        return genai.Client(api_key=GEMINI_API_KEY)
+    return None
+
+
+def _first_sentence_end(buffer: str) -> int:
+    """Return the end offset of the first complete sentence, or 0 if none yet."""
+    for match in SENTENCE_END_REGEX.finditer(buffer):
+        head = buffer[:match.start()]
+        if not head.strip():
+            continue
+        if match.group().startswith("."):
+            word = head.split()[-1].lstrip("\"'([").lower()
+            if word in ABBREVIATIONS or "." in word or (len(word) == 1 and word.isalpha()):
+                continue
+        return match.end()
+    return 0
+
+
 def _pick_response(options: List[str], used: List[str]) -> str:
     for option in options:
         if option not in used:
@@ -21,8 +70,8 @@ def _pick_response(options: List[str], used: List[str]) -> str:
     return random.choice(options)
 
 
-def _fallback_reply(strategy: str, session: Dict) -> str:
-    responses = session.get("responses", [])
+def _fallback_reply(strategy: str, session: Session) -> str:
+    responses = session.responses
     polite_openers = [
         "Ji, thoda clear karoge?",
         "Sorry, thoda samajh nahi aa raha.",
@@ -54,26 +103,20 @@ def _fallback_reply(strategy: str, session: Dict) -> str:
         pool = polite_openers + ["Aapka name aur department confirm kar do."] + callback_prompts
 
     reply = _pick_response(pool, responses)
-    session.setdefault("responses", []).append(reply)
+    session.responses.append(reply)
     return reply
 
 
-def generate_reply(
-    conversation: List[Dict],
-    session: Dict,
+def _build_prompt(
+    conversation: List[Message],
     strategy: str,
     scam_confidence: float,
     signals: List[str],
-):
-    if not GEMINI_API_KEY:
-        return _fallback_reply(strategy, session)
-
-    client = genai.Client(api_key=GEMINI_API_KEY)
-
+) -> str:
     history_lines = []
     for msg in conversation[-6:]:
-        sender = msg.get("sender", "scammer")
-        history_lines.append(f"{sender.title()}: {msg.get('text', '')}")
+        sender = msg.sender or "scammer"
+        history_lines.append(f"{sender.title()}: {msg.text}")
 
     strategy_instructions = {
         "high": "Engage and extract details; ask for callback, official ID, and verification steps.",
@@ -81,7 +124,7 @@ def generate_reply(
         "low": "Stay neutral, probe lightly, and ask for clarifying info.",
     }
 
-    prompt = "\n".join(
+    return "\n".join(
         [
             SYSTEM_PROMPT,
             f"Scam confidence: {scam_confidence}.",
@@ -94,12 +137,85 @@ def generate_reply(
         ]
     )
 
+
+def generate_reply(
+    conversation: List[Message],
+    session: Session,
+    strategy: str,
+    scam_confidence: float,
+    signals: List[str],
+    use_llm: bool = True,
+    client: Optional[object] = None,
+):
+    client = resolve_llm_client(client) if use_llm else None
+    if client is None:
+        return _fallback_reply(strategy, session)
+
+    prompt = _build_prompt(conversation, strategy, scam_confidence, signals)
+
     response = client.models.generate_content(
-        model="gemini-flash-lite-latest",
+        model=GEMINI_MODEL,
         contents=prompt,
     )
     reply = response.text.strip()
     if reply:
-        session.setdefault("responses", []).append(reply)
+        session.responses.append(reply)
         return reply
     return _fallback_reply(strategy, session)
+
+
+def generate_reply_stream(
+    conversation: List[Message],
+    session: Session,
+    strategy: str,
+    scam_confidence: float,
+    signals: List[str],
+    on_chunk: Callable[[str], None],
+    client: Optional[object] = None,
+    use_llm: bool = True,
+) -> str:
+    """Stream the reply, handing the first complete sentence to on_chunk early.
+
+    The remainder is delivered once the stream ends. The full reply is still
+    recorded in the session and returned.
+    """
+    client = resolve_llm_client(client) if use_llm else None
+    if client is None:
+        reply = _fallback_reply(strategy, session)
+        on_chunk(reply)
+        return reply
+
+    prompt = _build_prompt(conversation, strategy, scam_confidence, signals)
+
+    buffer = ""
+    delivered = 0
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+        ):
+            buffer += chunk.text or ""
+            if delivered:
+                continue
+            end = _first_sentence_end(buffer)
+            if end:
+                on_chunk(buffer[:end].strip())
+                delivered = end
+    except Exception:
+        if not delivered:
+            raise
+        # The scammer already saw the first sentence; keep what was said.
+        logger.exception("LLM stream interrupted after first sentence")
+        buffer = buffer[:delivered]
+
+    reply = buffer.strip()
+    if not reply:
+        reply = _fallback_reply(strategy, session)
+        on_chunk(reply)
+        return reply
+
+    remainder = buffer[delivered:].strip()
+    if remainder:
+        on_chunk(remainder)
+    session.responses.append(reply)
+    return reply
@@ -3,26 +3,27 @@ import logging
 import time
 import requests
 from app.config import GUVI_CALLBACK_URL
+from app.memory import Session
 
 logger = logging.getLogger(__name__)
 
 
-def _build_agent_notes(session_data: dict) -> str:
-    signals = ", ".join(session_data.get("scamSignals", []))
+def _build_agent_notes(session_data: Session) -> str:
+    signals = ", ".join(session_data.sorted_signals())
     if not signals:
         signals = "low-signal conversation"
     return f"Signals observed: {signals}."
 
 
-def send_final_callback(session_id, session_data):
-    duration = int(time.time()) - session_data.get("startedAt", int(time.time()))
+def send_final_callback(session_id: str, session_data: Session):
+    duration = int(time.time()) - session_data.started_at
     payload = {
         "sessionId": session_id,
         "status": "completed",
-        "scamDetected": session_data.get("scamDetected", False),
-        "extractedIntelligence": session_data.get("intelligence", {}),
+        "scamDetected": session_data.scam_detected,
+        "extractedIntelligence": session_data.intelligence_dict(),
         "engagementMetrics": {
-            "totalMessagesExchanged": len(session_data.get("messages", [])),
+            "totalMessagesExchanged": len(session_data.messages),
             "engagementDurationSeconds": max(duration, 0),
         },
         "agentNotes": _build_agent_notes(session_data),
@@ -8,6 +8,8 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 API_KEY = os.getenv("API_KEY")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+TELEGRAM_STREAM_REPLIES = os.getenv("TELEGRAM_STREAM_REPLIES", "false").lower() in {"1", "true", "yes"}
 DASHBOARD_API_KEY = os.getenv("DASHBOARD_API_KEY")
 DASHBOARD_DB_PATH = os.getenv("DASHBOARD_DB_PATH", "data/dashboard.db")
 DASHBOARD_ORIGINS_RAW = os.getenv("DASHBOARD_ORIGINS", "")
@@ -16,5 +18,17 @@ DASHBOARD_ORIGINS = [
 	for origin in DASHBOARD_ORIGINS_RAW.split(",")
 	if origin.strip()
 ]
+SESSION_SNAPSHOT_PATH = os.getenv("SESSION_SNAPSHOT_PATH", "data/sessions.snap")
+SESSION_SNAPSHOT_INTERVAL = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "30"))
+
+# Admission control; a rate or limit of 0 disables that policy.
+ADMISSION_API_KEY_RATE = float(os.getenv("ADMISSION_API_KEY_RATE", "20"))
+ADMISSION_API_KEY_BURST = float(os.getenv("ADMISSION_API_KEY_BURST", "40"))
+ADMISSION_SESSION_RATE = float(os.getenv("ADMISSION_SESSION_RATE", "0.5"))
+ADMISSION_SESSION_BURST = float(os.getenv("ADMISSION_SESSION_BURST", "5"))
+# A /honeypot session sending this many times its LLM rate and burst gets 429.
+ADMISSION_SESSION_REJECT_FACTOR = float(os.getenv("ADMISSION_SESSION_REJECT_FACTOR", "4"))
+ADMISSION_MAX_LLM_CALLS = int(os.getenv("ADMISSION_MAX_LLM_CALLS", "8"))
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "64"))
 
 GUVI_CALLBACK_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
@@ -1,11 +1,18 @@
-import json
 import os
+import re
 import sqlite3
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+from app import codec
 from app.config import DASHBOARD_DB_PATH
 
+SEARCH_TERM_REGEX = re.compile(r'"[^"]*"|\S+')
+SEARCH_OPERATORS = {"AND", "OR", "NOT"}
+# Deep pages still rank every match; dashboards refine the query instead.
+SEARCH_MAX_OFFSET = 1000
+SNIPPETS_PER_SESSION = 3
+
 
 def _get_conn() -> sqlite3.Connection:
     os.makedirs(os.path.dirname(DASHBOARD_DB_PATH), exist_ok=True)
@@ -28,6 +35,90 @@ def init_dashboard_db() -> None:
             )
             """
         )
+        # Stable integer ids for sessions; telegram_sessions' implicit rowid
+        # may be renumbered by VACUUM.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_search_ids (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        # One document per session, keyed by session_search_ids.id, so AND/NOT
+        # apply across the whole conversation. Contentless: the text already
+        # lives in telegram_sessions and is re-derived from it when needed.
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS session_search_fts USING fts5(
+                transcript,
+                entities,
+                content=''
+            )
+            """
+        )
+        _backfill_search_index(conn)
+
+
+def _search_document(raw_messages: List[Dict], intelligence: Dict) -> Tuple[str, str]:
+    transcript = "\n".join(message.get("text", "") for message in raw_messages)
+    entities = " ".join(
+        value for values in intelligence.values() if isinstance(values, (list, tuple)) for value in values
+    )
+    return transcript, entities
+
+
+def _index_session(
+    conn: sqlite3.Connection,
+    session_id: str,
+    previous: Optional[Tuple[str, str]],
+    raw_messages: List[Dict],
+    intelligence: Dict,
+) -> None:
+    """Replace the session's search document.
+
+    previous is the (extracted_intelligence, raw_messages) row that was
+    indexed last. A contentless FTS5 table can only delete a document given
+    the exact values it was built from, so they are rebuilt from that row.
+    """
+    row = conn.execute(
+        "SELECT id FROM session_search_ids WHERE session_id = ?",
+        (session_id,),
+    ).fetchone()
+    if row is None:
+        search_id = conn.execute(
+            "INSERT INTO session_search_ids (session_id) VALUES (?)",
+            (session_id,),
+        ).lastrowid
+    else:
+        search_id = row[0]
+        if previous is not None:
+            conn.execute(
+                """
+                INSERT INTO session_search_fts (session_search_fts, rowid, transcript, entities)
+                VALUES ('delete', ?, ?, ?)
+                """,
+                (search_id, *_search_document(codec.loads(previous[1]), codec.loads(previous[0]))),
+            )
+    conn.execute(
+        "INSERT INTO session_search_fts (rowid, transcript, entities) VALUES (?, ?, ?)",
+        (search_id, *_search_document(raw_messages, intelligence)),
+    )
+
+
+def _backfill_search_index(conn: sqlite3.Connection) -> None:
+    """Index sessions saved before the search tables existed."""
+    rows = conn.execute(
+        """
+        SELECT session_id, extracted_intelligence, raw_messages
+        FROM telegram_sessions AS t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM session_search_ids AS s WHERE s.session_id = t.session_id
+        )
+        """
+    ).fetchall()
+    for session_id, intelligence, raw_messages in rows:
+        _index_session(conn, session_id, None, codec.loads(raw_messages), codec.loads(intelligence))
 
 
 def save_telegram_final(payload: Dict, raw_messages: List[Dict]) -> None:
@@ -39,12 +130,19 @@ def save_telegram_final(payload: Dict, raw_messages: List[Dict]) -> None:
         "updated_at": now,
         "scam_detected": 1 if payload.get("scamDetected") else 0,
         "total_messages": payload.get("totalMessagesExchanged", engagement.get("totalMessagesExchanged", 0)),
-        "extracted_intelligence": json.dumps(payload.get("extractedIntelligence", {})),
+        "extracted_intelligence": codec.dumps(payload.get("extractedIntelligence", {})),
         "agent_notes": payload.get("agentNotes", ""),
-        "raw_messages": json.dumps(raw_messages),
+        "raw_messages": codec.dumps(raw_messages),
     }
 
     with _get_conn() as conn:
+        # Take the write lock before reading the previous row; two saves of a
+        # session must not both delete the same search document.
+        conn.execute("BEGIN IMMEDIATE")
+        previous = conn.execute(
+            "SELECT extracted_intelligence, raw_messages FROM telegram_sessions WHERE session_id = ?",
+            (record["session_id"],),
+        ).fetchone()
         conn.execute(
             """
             INSERT INTO telegram_sessions (
@@ -76,6 +174,13 @@ def save_telegram_final(payload: Dict, raw_messages: List[Dict]) -> None:
                 record["raw_messages"],
             ),
         )
+        _index_session(
+            conn,
+            record["session_id"],
+            previous,
+            raw_messages,
+            payload.get("extractedIntelligence", {}),
+        )
 
 
 def list_telegram_finals(limit: int = 100) -> List[Dict]:
@@ -101,9 +206,164 @@ def list_telegram_finals(limit: int = 100) -> List[Dict]:
                 "updatedAt": row[2],
                 "scamDetected": bool(row[3]),
                 "totalMessagesExchanged": row[4],
-                "extractedIntelligence": json.loads(row[5]),
+                "extractedIntelligence": codec.loads(row[5]),
                 "agentNotes": row[6],
-                "rawMessages": json.loads(row[7]),
+                "rawMessages": codec.loads(row[7]),
             }
         )
     return results
+
+
+def _fts_query(query: str) -> List[str]:
+    """Turn analyst input into FTS5 query tokens.
+
+    Terms are quoted so punctuation in domains, UPI IDs and phone numbers is
+    matched as a phrase instead of being parsed as FTS5 syntax. Quoted phrases
+    and bare AND/OR/NOT are kept as written. FTS5 operators are binary, so an
+    operator that is not between two terms raises ValueError rather than
+    being dropped, which would change the meaning of the query.
+    """
+    parts = []
+    for term in SEARCH_TERM_REGEX.findall(query):
+        if term in SEARCH_OPERATORS:
+            if not parts or parts[-1] in SEARCH_OPERATORS:
+                raise ValueError(f"{term} must follow a search term")
+            parts.append(term)
+            continue
+        term = term.strip('"')
+        if term:
+            parts.append('"' + term.replace('"', '""') + '"')
+    if parts and parts[-1] in SEARCH_OPERATORS:
+        raise ValueError(f"{parts[-1]} must be followed by a search term")
+    return parts
+
+
+def _snippets(conn: sqlite3.Connection, session_ids: List[str], parts: List[str]) -> Dict[str, Dict]:
+    """Pick the best matching messages and the matching entities per session.
+
+    The page's messages and entities are loaded into a temporary FTS5 table
+    and matched against any term that is not negated, so snippet cost depends
+    on the page size, not on how common the terms are.
+    """
+    terms = [
+        part
+        for index, part in enumerate(parts)
+        if part not in SEARCH_OPERATORS and (index == 0 or parts[index - 1] != "NOT")
+    ]
+    placeholders = ", ".join("?" * len(session_ids))
+    rows = conn.execute(
+        f"""
+        SELECT session_id, extracted_intelligence, raw_messages
+        FROM telegram_sessions
+        WHERE session_id IN ({placeholders})
+        """,
+        session_ids,
+    ).fetchall()
+
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE temp.search_snippets USING fts5(
+            session_id UNINDEXED,
+            position UNINDEXED,
+            text
+        )
+        """
+    )
+    try:
+        messages = {}
+        documents = []
+        for session_id, intelligence, raw_messages in rows:
+            raw_messages = codec.loads(raw_messages)
+            messages[session_id] = raw_messages
+            documents.extend(
+                (session_id, seq, message.get("text", "")) for seq, message in enumerate(raw_messages)
+            )
+            documents.extend(
+                (session_id, None, value)
+                for values in codec.loads(intelligence).values()
+                if isinstance(values, list)
+                for value in values
+            )
+        conn.executemany(
+            "INSERT INTO search_snippets (session_id, position, text) VALUES (?, ?, ?)",
+            documents,
+        )
+        snippets = {session_id: {"messages": [], "entities": []} for session_id in messages}
+        for session_id, seq, text, snippet in conn.execute(
+            """
+            SELECT session_id, position, text, snippet(search_snippets, 2, '[', ']', '...', 12)
+            FROM search_snippets
+            WHERE search_snippets MATCH ?
+            ORDER BY rank
+            """,
+            (" OR ".join(terms),),
+        ):
+            found = snippets[session_id]
+            if seq is None:
+                found["entities"].append(text)
+            elif len(found["messages"]) < SNIPPETS_PER_SESSION:
+                message = messages[session_id][seq]
+                found["messages"].append(
+                    {
+                        "messageIndex": seq,
+                        "sender": message.get("sender", ""),
+                        "timestamp": message.get("timestamp", 0),
+                        "snippet": snippet,
+                    }
+                )
+    finally:
+        conn.execute("DROP TABLE temp.search_snippets")
+    return snippets
+
+
+def search_sessions(query: str, limit: int = 20, offset: int = 0) -> Dict:
+    """Rank sessions matching query, with their best matching messages.
+
+    Each session is one document covering its transcript and extracted
+    intelligence, so every term of "kyc AND otp" may come from a different
+    message. Raises ValueError for a query with a misplaced AND/OR/NOT.
+    """
+    parts = _fts_query(query)
+    if not parts:
+        return {"query": query, "results": [], "offset": offset, "limit": limit, "hasMore": False}
+
+    with _get_conn() as conn:
+        # Rank first and build snippets only for the requested page.
+        page = conn.execute(
+            """
+            SELECT s.session_id, page.rank
+            FROM (
+                SELECT rowid, rank FROM session_search_fts
+                WHERE session_search_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            ) AS page
+            JOIN session_search_ids AS s ON s.id = page.rowid
+            ORDER BY page.rank
+            """,
+            (" ".join(parts), limit + 1, offset),
+        ).fetchall()
+        has_more = len(page) > limit
+        page = page[:limit]
+        snippets = _snippets(conn, [session_id for session_id, _rank in page], parts) if page else {}
+
+    results = []
+    for session_id, rank in page:
+        found = snippets.get(session_id)
+        if found is None:
+            continue
+        results.append(
+            {
+                "sessionId": session_id,
+                "score": -rank,
+                "messages": found["messages"],
+                "entities": found["entities"],
+            }
+        )
+    return {
+        "query": query,
+        "results": results,
+        "offset": offset,
+        "limit": limit,
+        "hasMore": has_more,
+    }
@@ -3,18 +3,38 @@ import re
 from typing import Dict, Iterable, List, Set
 from urllib.parse import urlparse
 
+from app.memory import Message
+
 
 EMAIL_REGEX = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
 UPI_REGEX = re.compile(r"\b[a-zA-Z0-9._-]{2,}@[a-zA-Z0-9._-]{2,}\b")
 URL_REGEX = re.compile(r"https?://[^\s)]+")
 DOMAIN_REGEX = re.compile(r"\b(?:[a-z0-9-]+\.)+[a-z]{2,}\b", re.IGNORECASE)
-PHONE_REGEX = re.compile(r"\b(?:\+?\d{1,3}[-\s]?)?(?:[6-9]\d{9}|\d{10,12})\b")
+# The leading lookaheads only restate each pattern's possible first character;
+# they let the regex engine skip ahead instead of trying \b at every position.
+PHONE_REGEX = re.compile(r"(?=[+\d])\b(?:\+?\d{1,3}[-\s]?)?(?:[6-9]\d{9}|\d{10,12})\b")
 ACCOUNT_REGEX = re.compile(r"\b\d{8,18}\b")
+DIGIT_RUN_REGEX = re.compile(r"\d{8}")
 REF_ID_REGEX = re.compile(
-    r"\b(?:ref(?:erence)?|ticket|case|emp(?:loyee)?|id)[:\s-]*([A-Za-z0-9-]{4,})\b",
+    r"(?=[rtcei])\b(?:ref(?:erence)?|ticket|case|emp(?:loyee)?|id)[:\s-]*([A-Za-z0-9-]{4,})\b",
     re.IGNORECASE,
 )
 
+SUSPICIOUS_KEYWORDS = (
+    "urgent",
+    "verify",
+    "blocked",
+    "otp",
+    "suspend",
+    "freeze",
+    "compromise",
+    "expire",
+    "immediate",
+    "jaldi",
+    "turant",
+    "abhi",
+)
+
 SUSPICIOUS_TLDS = {"xyz", "top", "site", "click", "link", "tk", "work", "monster"}
 COMMON_UPI_HANDLES = {
     "upi",
@@ -65,70 +85,87 @@ def _is_suspicious_domain(domain: str) -> bool:
     return False
 
 
-def _update_set(store: dict, key: str, values: Iterable[str]) -> None:
-    current = set(store.get(key, []))
-    current.update(values)
-    store[key] = sorted(current)
-
-
-def extract_intelligence(messages: List[Dict], store: dict) -> dict:
+def _update_set(store: Dict[str, Set[str]], key: str, values: Iterable[str]) -> None:
+    values = set(values)
+    if values:
+        store.setdefault(key, set()).update(values)
+
+
+def _scan_tokens(text: str) -> Dict[str, Set[str]]:
+    """Collect candidate entities in a single pass over whitespace tokens.
+
+    Each token is only handed to the patterns its characters can trigger:
+    "://" for URLs, "@" for emails and UPI IDs, an inner "." for domains and
+    a digit run for accounts. The old per-kind filters still apply (bare
+    10-digit mobiles are not accounts, UPI handles must look like one), but
+    kinds do not exclude each other: a 12-digit number is reported as both an
+    account and a phone number.
+    """
+    spans = {kind: set() for kind in ("email", "upi", "url", "domain", "account")}
+    phone_possible = False
+
+    # EMAIL, UPI, URL, DOMAIN and ACCOUNT never match whitespace, so running
+    # them per token yields exactly what a whole-text findall would.
+    for token in text.split():
+        if token.isalpha():
+            continue
+        if "://" in token:
+            spans["url"].update(URL_REGEX.findall(token))
+        if "@" in token:
+            if "." in token:
+                spans["email"].update(EMAIL_REGEX.findall(token))
+            for candidate in UPI_REGEX.findall(token):
+                handle = candidate.split("@", 1)[-1].lower()
+                if handle in COMMON_UPI_HANDLES or handle.isalpha():
+                    spans["upi"].add(candidate)
+        if "." in token[:-2]:
+            spans["domain"].update(DOMAIN_REGEX.findall(token))
+        if not DIGIT_RUN_REGEX.search(token):
+            continue
+        for digits in ACCOUNT_REGEX.findall(token):
+            # Every phone match contains a bounded 10-15 digit run, so phones
+            # are only searched for once such a run has been seen.
+            if len(digits) >= 10:
+                phone_possible = True
+            if not (len(digits) == 10 and digits[0] in "6789"):
+                spans["account"].add(digits)
+
+    spans["phone"] = set()
+    if phone_possible:
+        # PHONE may span a space between country code and number, so it
+        # cannot be matched per token.
+        for raw in PHONE_REGEX.findall(text):
+            normalized = _normalize_phone(raw)
+            if len(normalized.replace("+", "")) >= 10:
+                spans["phone"].add(normalized)
+    return spans
+
+
+def extract_intelligence(messages: List[Message], store: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
     """Extract intelligence from scammer messages only."""
     scammer_text = " ".join(
-        [msg.get("text", "") for msg in messages if msg.get("sender", "").lower() == "scammer"]
+        [msg.text for msg in messages if msg.sender.lower() == "scammer"]
     )
     if not scammer_text.strip():
         return store
 
     text_lower = scammer_text.lower()
+    spans = _scan_tokens(scammer_text)
 
-    upi_candidates = set(UPI_REGEX.findall(scammer_text))
-    email_candidates = set(EMAIL_REGEX.findall(scammer_text))
-    upi_ids = set()
-    for candidate in upi_candidates:
-        handle = candidate.split("@", 1)[-1].lower()
-        if handle in COMMON_UPI_HANDLES or handle.isalpha():
-            upi_ids.add(candidate)
-
-    accounts = set(ACCOUNT_REGEX.findall(scammer_text))
-    phone_numbers = set()
-    for match in PHONE_REGEX.findall(scammer_text):
-        normalized = _normalize_phone(match)
-        if len(normalized.replace("+", "")) >= 10:
-            phone_numbers.add(normalized)
-
-    links = set(URL_REGEX.findall(scammer_text))
-    domains = set(DOMAIN_REGEX.findall(scammer_text))
+    links = spans["url"]
+    domains = spans["domain"]
     domains.update(_domain_from_url(link) for link in links)
-
     suspicious_domains = {domain for domain in domains if _is_suspicious_domain(domain)}
 
     reference_ids = set(REF_ID_REGEX.findall(scammer_text))
+    suspicious_keywords = {word for word in SUSPICIOUS_KEYWORDS if word in text_lower}
 
-    keywords = [
-        "urgent",
-        "verify",
-        "blocked",
-        "otp",
-        "suspend",
-        "freeze",
-        "compromise",
-        "expire",
-        "immediate",
-        "jaldi",
-        "turant",
-        "abhi",
-    ]
-    suspicious_keywords = {word for word in keywords if word in text_lower}
-
-    # Avoid classifying 10-digit phone numbers as bank accounts
-    filtered_accounts = {acct for acct in accounts if not (len(acct) == 10 and acct[0] in "6789")}
-
-    _update_set(store, "bankAccounts", filtered_accounts)
-    _update_set(store, "upiIds", upi_ids)
+    _update_set(store, "bankAccounts", spans["account"])
+    _update_set(store, "upiIds", spans["upi"])
     _update_set(store, "phishingLinks", links)
-    _update_set(store, "phoneNumbers", phone_numbers)
+    _update_set(store, "phoneNumbers", spans["phone"])
     _update_set(store, "suspiciousKeywords", suspicious_keywords)
-    _update_set(store, "emailAddresses", email_candidates)
+    _update_set(store, "emailAddresses", spans["email"])
     _update_set(store, "urls", links)
     _update_set(store, "suspiciousDomains", suspicious_domains)
     _update_set(store, "referenceIds", reference_ids)
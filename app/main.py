@@ -1,29 +1,77 @@
 import logging
 import os
 import time
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import requests
-from fastapi import FastAPI, Header, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from app import codec
 from app.schemas import RequestSchema
 from app.config import (
     API_KEY,
     DASHBOARD_API_KEY,
     DASHBOARD_ORIGINS,
+    SESSION_SNAPSHOT_INTERVAL,
+    SESSION_SNAPSHOT_PATH,
+    TELEGRAM_API_BASE,
     TELEGRAM_BOT_TOKEN,
+    TELEGRAM_STREAM_REPLIES,
     TELEGRAM_WEBHOOK_SECRET,
 )
+from app.admission import (
+    acquire_llm,
+    admission_stats,
+    admit_api_key,
+    admit_session,
+    enter_request,
+    exit_request,
+    release_llm,
+)
 from app.scam_detector import detect_scam
-from app.agent import generate_reply
+from app.agent import generate_reply, generate_reply_stream, resolve_llm_client
 from app.intelligence import extract_intelligence
-from app.memory import get_session
+from app.memory import Message, Session, get_session, mark_dirty
+from app.snapshot import SnapshotWriter, restore_sessions, start_snapshotter
 from app.callback import send_final_callback
-from app.dashboard_store import init_dashboard_db, list_telegram_finals, save_telegram_final
+from app.dashboard_store import (
+    SEARCH_MAX_OFFSET,
+    init_dashboard_db,
+    list_telegram_finals,
+    save_telegram_final,
+    search_sessions,
+)
 
 import uvicorn
 
-app = FastAPI()
+class CodecJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return codec.dumps_bytes(content)
+
+
+class CodecRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = codec.loads(await self.body())
+        return self._json
+
+
+class CodecRoute(APIRoute):
+    """Decodes JSON bodies with the codec; FastAPI still validates them."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            return await handler(CodecRequest(request.scope, request.receive))
+
+        return route_handler
+
+
+app = FastAPI(default_response_class=CodecJSONResponse)
+app.router.route_class = CodecRoute
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.DEBUG,
@@ -40,17 +88,35 @@ app.add_middleware(
 )
 
 
+snapshot_writer: Optional[SnapshotWriter] = None
+snapshot_stop = None
+
+
 @app.on_event("startup")
 def startup() -> None:
+    global snapshot_writer, snapshot_stop
+    # Restore before anything else so early webhook retries find their sessions.
+    if SESSION_SNAPSHOT_PATH:
+        reader = restore_sessions(SESSION_SNAPSHOT_PATH)
+        snapshot_writer = SnapshotWriter(SESSION_SNAPSHOT_PATH, reader)
+        snapshot_stop = start_snapshotter(snapshot_writer, SESSION_SNAPSHOT_INTERVAL)
     init_dashboard_db()
 
 
-def build_agent_notes(session: dict) -> str:
-    signals = ", ".join(session.get("scamSignals", []))
+@app.on_event("shutdown")
+def shutdown() -> None:
+    if snapshot_stop is not None:
+        snapshot_stop.set()
+    if snapshot_writer is not None:
+        snapshot_writer.write()
+
+
+def build_agent_notes(session: Session) -> str:
+    signals = ", ".join(session.sorted_signals())
     if not signals:
         signals = "low-signal conversation"
     notes = f"Signals observed: {signals}."
-    intelligence = session.get("intelligence", {})
+    intelligence = session.intelligence
     key_entities = []
     if intelligence.get("phoneNumbers"):
         key_entities.append("phone numbers")
@@ -65,116 +131,182 @@ def build_agent_notes(session: dict) -> str:
     return notes
 
 
-def build_final_payload(session_id: str, session: dict) -> dict:
-    duration = int(time.time()) - session.get("startedAt", int(time.time()))
+def build_final_payload(session_id: str, session: Session) -> dict:
+    duration = int(time.time()) - session.started_at
     return {
         "sessionId": session_id,
         "status": "completed",
-        "scamDetected": session.get("scamDetected", False),
-        "extractedIntelligence": session.get("intelligence", {}),
+        "scamDetected": session.scam_detected,
+        "extractedIntelligence": session.intelligence_dict(),
         "engagementMetrics": {
-            "totalMessagesExchanged": len(session.get("messages", [])),
+            "totalMessagesExchanged": len(session.messages),
             "engagementDurationSeconds": max(duration, 0),
         },
         "agentNotes": build_agent_notes(session),
     }
 
 
-def build_dashboard_payload(session_id: str, session: dict) -> dict:
+def build_dashboard_payload(session_id: str, session: Session) -> dict:
     payload = build_final_payload(session_id, session)
-    payload["scamConfidence"] = session.get("scamConfidence", 0.0)
-    payload["totalMessagesExchanged"] = len(session.get("messages", []))
+    payload["scamConfidence"] = session.scam_confidence
+    payload["totalMessagesExchanged"] = len(session.messages)
     return payload
 
 
-def process_message(session_id: str, message: dict) -> str:
+def process_message(
+    session_id: str,
+    incoming: Message,
+    on_reply_chunk: Optional[Callable[[str], None]] = None,
+) -> str:
     session = get_session(session_id)
     now = int(time.time())
-    session["messages"].append(message)
-    session["conversationCount"] += 1
-    session["lastUpdatedAt"] = now
+    session.messages.append(incoming)
+    session.conversation_count += 1
+    session.last_updated_at = now
 
     # Always extract intelligence from scammer messages, even before a scam is flagged.
-    extract_intelligence(session["messages"], session["intelligence"])
-    for key, value in session["intelligence"].items():
-        if isinstance(value, list):
-            session["entitiesCollected"][key] = len(value)
-
-    if message.get("sender", "").lower() == "scammer":
-        detection = detect_scam(message.get("text", ""))
-        session["scamConfidence"] = max(session.get("scamConfidence", 0.0), detection["score"])
-        session_signals = set(session.get("scamSignals", []))
-        session_signals.update(detection.get("categories", []))
-        session["scamSignals"] = sorted(session_signals)
-
-        if session["scamConfidence"] >= 0.75:
-            session["scamDetected"] = True
-
-    if session["scamConfidence"] >= 0.75:
+    extract_intelligence(session.messages, session.intelligence)
+
+    if incoming.sender.lower() == "scammer":
+        detection = detect_scam(incoming.text)
+        session.scam_confidence = max(session.scam_confidence, detection["score"])
+        session.add_signals(detection.get("categories", []))
+
+        if session.scam_confidence >= 0.75:
+            session.scam_detected = True
+
+    if session.scam_confidence >= 0.75:
         strategy = "high"
-    elif session["scamConfidence"] >= 0.45:
+    elif session.scam_confidence >= 0.45:
         strategy = "moderate"
     else:
         strategy = "low"
 
+    # Over the per-session rate or with every LLM slot busy, answer from the
+    # canned replies instead of queueing behind other sessions. Without a
+    # client the reply is canned anyway, so no token or slot is taken.
+    client = resolve_llm_client()
+    use_llm = client is not None and acquire_llm(session_id)
     try:
-        reply = generate_reply(
-            session["messages"],
-            session=session,
-            strategy=strategy,
-            scam_confidence=session["scamConfidence"],
-            signals=session.get("scamSignals", []),
-        )
+        if on_reply_chunk is None:
+            reply = generate_reply(
+                session.messages,
+                session=session,
+                strategy=strategy,
+                scam_confidence=session.scam_confidence,
+                signals=session.sorted_signals(),
+                use_llm=use_llm,
+                client=client,
+            )
+        else:
+            reply = generate_reply_stream(
+                session.messages,
+                session=session,
+                strategy=strategy,
+                scam_confidence=session.scam_confidence,
+                signals=session.sorted_signals(),
+                on_chunk=on_reply_chunk,
+                use_llm=use_llm,
+                client=client,
+            )
     except Exception as e:
         logger.exception("LLM failed, using fallback")
         print("🔥 REAL LLM ERROR:", repr(e))
         reply = "Thoda clear batana, mujhe samajh nahi aa raha."
+        if on_reply_chunk is not None:
+            on_reply_chunk(reply)
+    finally:
+        if use_llm:
+            release_llm()
 
-    session["messages"].append(
-        {"sender": "user", "text": reply, "timestamp": int(time.time())}
-    )
-    session["conversationCount"] += 1
-    session["lastUpdatedAt"] = int(time.time())
+    session.messages.append(Message("user", reply, int(time.time())))
+    session.conversation_count += 1
+    session.last_updated_at = int(time.time())
+    mark_dirty(session_id)
 
     if session_id.startswith("telegram:"):
         payload = build_dashboard_payload(session_id, session)
-        save_telegram_final(payload, session["messages"])
-    elif session["scamDetected"] and len(session["messages"]) >= 8:
+        save_telegram_final(payload, session.messages_dicts())
+    elif session.scam_detected and len(session.messages) >= 8:
         send_final_callback(session_id, session)
 
     return reply
 
 
+def _telegram_api_url(method: str) -> str:
+    return f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/{method}"
+
+
 def send_telegram_message(chat_id: int, text: str) -> None:
     if not TELEGRAM_BOT_TOKEN:
         logger.warning("Telegram bot token missing; skipping send")
         return
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {"chat_id": chat_id, "text": text}
     try:
-        requests.post(url, json=payload, timeout=5)
+        requests.post(_telegram_api_url("sendMessage"), json=payload, timeout=5)
     except requests.RequestException:
         logger.exception("Failed to send Telegram message")
 
 
-@app.post("/honeypot")
-def honeypot(data: RequestSchema, x_api_key: str = Header(...)):
+def send_telegram_chat_action(chat_id: int, action: str = "typing") -> None:
+    if not TELEGRAM_BOT_TOKEN:
+        return
+
+    payload = {"chat_id": chat_id, "action": action}
+    try:
+        requests.post(_telegram_api_url("sendChatAction"), json=payload, timeout=2)
+    except requests.RequestException:
+        logger.exception("Failed to send Telegram chat action")
+
+
+# Admission runs in async dependencies, on the event loop, so overloaded
+# requests are refused before they queue for a threadpool worker. The slot is
+# held until the sync handler returns.
+async def admit_honeypot(request: Request, x_api_key: str = Header(...)):
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
-
-    reply = process_message(data.sessionId, data.message.dict())
-    return {"status": "success", "reply": reply}
+    # The body is already decoded by the time dependencies run; a malformed
+    # one is left for RequestSchema to reject with 422.
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    session_id = body.get("sessionId") if isinstance(body, dict) else None
+    # Checked before the API key bucket so rejected requests don't drain it.
+    if isinstance(session_id, str) and not admit_session(session_id):
+        raise HTTPException(status_code=429, detail="Session rate limit exceeded", headers={"Retry-After": "1"})
+    if not admit_api_key(x_api_key):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": "1"})
+    if not enter_request():
+        raise HTTPException(status_code=503, detail="Server overloaded", headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        exit_request()
 
 
-@app.post("/webhook/telegram")
-def telegram_webhook(
-    update: dict,
-    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
-):
+async def admit_telegram(x_telegram_bot_api_secret_token: Optional[str] = Header(None)):
     if TELEGRAM_WEBHOOK_SECRET and x_telegram_bot_api_secret_token != TELEGRAM_WEBHOOK_SECRET:
         raise HTTPException(status_code=401, detail="Invalid Telegram secret")
+    # Telegram redelivers the update later when it gets a non-2xx response.
+    if not enter_request():
+        raise HTTPException(status_code=503, detail="Server overloaded", headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        exit_request()
+
+
+@app.post("/honeypot", dependencies=[Depends(admit_honeypot)])
+def honeypot(data: RequestSchema):
+    message = data.message
+    reply = process_message(data.sessionId, Message(message.sender, message.text, message.timestamp))
+    return CodecJSONResponse({"status": "success", "reply": reply})
 
+
+@app.post("/webhook/telegram", dependencies=[Depends(admit_telegram)])
+def telegram_webhook(update: dict):
     message = update.get("message") or update.get("edited_message")
     if not message or "text" not in message:
         return {"ok": True}
@@ -182,14 +314,18 @@ def telegram_webhook(
     chat_id = message["chat"]["id"]
     session_id = f"telegram:{chat_id}"
     timestamp = message.get("date", int(time.time()))
-    incoming = {
-        "sender": "scammer",
-        "text": message["text"],
-        "timestamp": timestamp
-    }
-
-    reply = process_message(session_id, incoming)
-    send_telegram_message(chat_id, reply)
+    incoming = Message("scammer", message["text"], timestamp)
+
+    if TELEGRAM_STREAM_REPLIES:
+        send_telegram_chat_action(chat_id)
+        process_message(
+            session_id,
+            incoming,
+            on_reply_chunk=lambda text: send_telegram_message(chat_id, text),
+        )
+    else:
+        reply = process_message(session_id, incoming)
+        send_telegram_message(chat_id, reply)
     return {"ok": True}
 
 
@@ -200,7 +336,39 @@ def dashboard_records(x_api_key: str = Header(...), limit: int = 100):
     if x_api_key != DASHBOARD_API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    return {"records": list_telegram_finals(limit)}
+    # Returning the response directly skips FastAPI's jsonable_encoder walk
+    # over every transcript.
+    return CodecJSONResponse({"records": list_telegram_finals(limit)})
+
+
+@app.get("/dashboard/admission")
+def dashboard_admission(x_api_key: str = Header(...)):
+    if not DASHBOARD_API_KEY:
+        raise HTTPException(status_code=500, detail="Dashboard API key not configured")
+    if x_api_key != DASHBOARD_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return admission_stats()
+
+
+@app.get("/dashboard/search")
+def dashboard_search(
+    q: str,
+    x_api_key: str = Header(...),
+    limit: int = 20,
+    offset: int = 0,
+):
+    if not DASHBOARD_API_KEY:
+        raise HTTPException(status_code=500, detail="Dashboard API key not configured")
+    if x_api_key != DASHBOARD_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    limit = min(max(limit, 1), 100)
+    try:
+        results = search_sessions(q, limit=limit, offset=min(max(offset, 0), SEARCH_MAX_OFFSET))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CodecJSONResponse(results)
 
 
 if __name__ == "__main__":
@@ -1,42 +1,128 @@
 
+import sys
+import threading
 import time
+from typing import Dict, Iterable, List, Optional, Protocol, Set
 
-SESSION_STORE = {}
-
-
-def get_session(session_id):
-    if session_id not in SESSION_STORE:
-        now = int(time.time())
-        SESSION_STORE[session_id] = {
-            "messages": [],
-            "responses": [],
-            "intelligence": {
-                "bankAccounts": [],
-                "upiIds": [],
-                "phishingLinks": [],
-                "phoneNumbers": [],
-                "suspiciousKeywords": [],
-                "emailAddresses": [],
-                "urls": [],
-                "suspiciousDomains": [],
-                "referenceIds": []
-            },
-            "entitiesCollected": {
-                "bankAccounts": 0,
-                "upiIds": 0,
-                "phishingLinks": 0,
-                "phoneNumbers": 0,
-                "suspiciousKeywords": 0,
-                "emailAddresses": 0,
-                "urls": 0,
-                "suspiciousDomains": 0,
-                "referenceIds": 0
-            },
-            "scamDetected": False,
-            "scamConfidence": 0.0,
-            "scamSignals": [],
-            "conversationCount": 0,
-            "startedAt": now,
-            "lastUpdatedAt": now
+INTELLIGENCE_KEYS = (
+    "bankAccounts",
+    "upiIds",
+    "phishingLinks",
+    "phoneNumbers",
+    "suspiciousKeywords",
+    "emailAddresses",
+    "urls",
+    "suspiciousDomains",
+    "referenceIds",
+)
+
+
+class Message:
+    __slots__ = ("sender", "text", "timestamp")
+
+    def __init__(self, sender: str, text: str, timestamp: int) -> None:
+        # Senders repeat on every turn ("scammer"/"user"); share one string.
+        self.sender = sys.intern(sender)
+        self.text = text
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Message":
+        return cls(data.get("sender", ""), data.get("text", ""), data.get("timestamp", 0))
+
+    def to_dict(self) -> Dict:
+        return {"sender": self.sender, "text": self.text, "timestamp": self.timestamp}
+
+
+class Session:
+    __slots__ = (
+        "messages",
+        "responses",
+        "intelligence",
+        "scam_detected",
+        "scam_confidence",
+        "scam_signals",
+        "conversation_count",
+        "started_at",
+        "last_updated_at",
+    )
+
+    def __init__(self, now: int) -> None:
+        self.messages: List[Message] = []
+        self.responses: List[str] = []
+        # Only categories that have entities get a set; sorted on serialization.
+        self.intelligence: Dict[str, Set[str]] = {}
+        self.scam_detected = False
+        self.scam_confidence = 0.0
+        self.scam_signals: Set[str] = set()
+        self.conversation_count = 0
+        self.started_at = now
+        self.last_updated_at = now
+
+    def add_signals(self, categories: Iterable[str]) -> None:
+        self.scam_signals.update(sys.intern(category) for category in categories)
+
+    def sorted_signals(self) -> List[str]:
+        return sorted(self.scam_signals)
+
+    def intelligence_dict(self) -> Dict[str, List[str]]:
+        return {key: sorted(self.intelligence.get(key, ())) for key in INTELLIGENCE_KEYS}
+
+    def entities_collected(self) -> Dict[str, int]:
+        return {key: len(self.intelligence.get(key, ())) for key in INTELLIGENCE_KEYS}
+
+    def messages_dicts(self) -> List[Dict]:
+        return [message.to_dict() for message in self.messages]
+
+    def to_dict(self) -> Dict:
+        return {
+            "messages": self.messages_dicts(),
+            "responses": list(self.responses),
+            "intelligence": self.intelligence_dict(),
+            "entitiesCollected": self.entities_collected(),
+            "scamDetected": self.scam_detected,
+            "scamConfidence": self.scam_confidence,
+            "scamSignals": self.sorted_signals(),
+            "conversationCount": self.conversation_count,
+            "startedAt": self.started_at,
+            "lastUpdatedAt": self.last_updated_at,
         }
-    return SESSION_STORE[session_id]
+
+
+class RestoreSource(Protocol):
+    def take(self, session_id: str) -> Optional[Session]:
+        ...
+
+
+SESSION_STORE: Dict[str, Session] = {}
+# Sessions changed since the last snapshot.
+DIRTY_SESSIONS: Set[str] = set()
+# Sessions restored from a snapshot are decoded on first access.
+_restore_source: Optional[RestoreSource] = None
+# Held while a session is created or taken from the restore source, so a
+# session is always in SESSION_STORE or still pending in the source.
+SESSION_CREATE_LOCK = threading.Lock()
+
+
+def set_restore_source(source: Optional[RestoreSource]) -> None:
+    global _restore_source
+    _restore_source = source
+
+
+def get_session(session_id: str) -> Session:
+    session = SESSION_STORE.get(session_id)
+    if session is not None:
+        return session
+    with SESSION_CREATE_LOCK:
+        session = SESSION_STORE.get(session_id)
+        if session is None:
+            if _restore_source is not None:
+                session = _restore_source.take(session_id)
+            if session is None:
+                session = Session(int(time.time()))
+            SESSION_STORE[session_id] = session
+    return session
+
+
+def mark_dirty(session_id: str) -> None:
+    DIRTY_SESSIONS.add(session_id)
@@ -1,11 +1,12 @@
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
 
 class Message(BaseModel):
     sender: str
     text: str
-    timestamp: int
+    # orjson, which later encodes the transcript, only handles 64-bit integers.
+    timestamp: int = Field(ge=-2**63, le=2**63 - 1)
 
 class Metadata(BaseModel):
     channel: Optional[str]
@@ -15,5 +16,7 @@ class Metadata(BaseModel):
 class RequestSchema(BaseModel):
     sessionId: str
     message: Message
-    conversationHistory: List[Message]
+    # Documented as a list of Message, but /honeypot never reads it, so the
+    # items are not validated; that was most of the decode cost on long chats.
+    conversationHistory: List[Any]
     metadata: Optional[Metadata]
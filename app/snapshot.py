@@ -0,0 +1,271 @@
+import logging
+import marshal
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.memory import (
+    DIRTY_SESSIONS,
+    SESSION_CREATE_LOCK,
+    SESSION_STORE,
+    Message,
+    Session,
+    set_restore_source,
+)
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, then records of (key length, payload length, key, payload).
+# Records are appended; the last record for a session id wins.
+MAGIC = b"HPSNAP1" + bytes([marshal.version])
+RECORD_HEADER = struct.Struct("<II")
+# Rewrite the file once it is this many times larger than its live records.
+COMPACT_RATIO = 2.0
+
+
+def encode_session(session: Session) -> bytes:
+    # Copy containers first; request threads may append while this runs.
+    messages = tuple(session.messages)
+    intelligence = dict(session.intelligence)
+    state = (
+        tuple((message.sender, message.text, message.timestamp) for message in messages),
+        tuple(session.responses),
+        {key: tuple(values.copy()) for key, values in intelligence.items()},
+        session.scam_detected,
+        session.scam_confidence,
+        tuple(session.scam_signals.copy()),
+        session.conversation_count,
+        session.started_at,
+        session.last_updated_at,
+    )
+    return marshal.dumps(state)
+
+
+def decode_session(payload: bytes) -> Session:
+    (
+        messages,
+        responses,
+        intelligence,
+        scam_detected,
+        scam_confidence,
+        scam_signals,
+        conversation_count,
+        started_at,
+        last_updated_at,
+    ) = marshal.loads(payload)
+    session = Session(started_at)
+    session.messages = [Message(sender, text, timestamp) for sender, text, timestamp in messages]
+    session.responses = list(responses)
+    session.intelligence = {key: set(values) for key, values in intelligence.items()}
+    session.scam_detected = scam_detected
+    session.scam_confidence = scam_confidence
+    session.add_signals(scam_signals)
+    session.conversation_count = conversation_count
+    session.last_updated_at = last_updated_at
+    return session
+
+
+class SnapshotReader:
+    """Memory-mapped snapshot whose sessions are decoded on first access."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._lock = threading.Lock()
+        self.index: Dict[str, Tuple[int, int]] = {}
+        # Offset just past the last complete record.
+        self.valid_end = len(MAGIC)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("unrecognized snapshot header")
+        self._scan()
+
+    def _scan(self) -> None:
+        data = self._map
+        size = len(data)
+        offset = len(MAGIC)
+        unpack = RECORD_HEADER.unpack_from
+        header_size = RECORD_HEADER.size
+        index = self.index
+        while offset + header_size <= size:
+            key_length, payload_length = unpack(data, offset)
+            key_end = offset + header_size + key_length
+            end = key_end + payload_length
+            if end > size:
+                # A crash during an append leaves a truncated final record.
+                break
+            try:
+                session_id = data[offset + header_size:key_end].decode("utf-8")
+            except UnicodeDecodeError:
+                # Garbage after the last good record; treat it as a torn tail.
+                break
+            index[session_id] = (key_end, payload_length)
+            offset = end
+        self.valid_end = offset
+
+    def payload(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            location = self.index.get(session_id)
+            if location is None:
+                return None
+            start, length = location
+            return self._map[start:start + length]
+
+    def take(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            location = self.index.pop(session_id, None)
+            if location is None:
+                return None
+            start, length = location
+            payload = self._map[start:start + length]
+        try:
+            return decode_session(payload)
+        except (EOFError, TypeError, ValueError):
+            logger.exception("Dropping undecodable snapshot record for session %s", session_id)
+            return None
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return list(self.index)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+def _record(session_id: str, payload: bytes) -> bytes:
+    key = session_id.encode("utf-8")
+    return RECORD_HEADER.pack(len(key), len(payload)) + key + payload
+
+
+class SnapshotWriter:
+    """Append changed sessions to the snapshot and compact it when it bloats."""
+
+    def __init__(self, path: str, reader: Optional[SnapshotReader] = None) -> None:
+        self.path = path
+        self.reader = reader
+        self._lock = threading.Lock()
+        # Size of the latest record per session, to know when to compact.
+        self._live: Dict[str, int] = {}
+        self._live_bytes = len(MAGIC)
+        self._file_size = 0
+        if reader is not None:
+            for session_id, (_start, length) in reader.index.items():
+                self._live[session_id] = RECORD_HEADER.size + len(session_id.encode("utf-8")) + length
+            self._live_bytes += sum(self._live.values())
+            self._file_size = os.path.getsize(path)
+            # Cut a record left half-written by a crash so appends start clean.
+            if self._file_size > reader.valid_end:
+                with open(path, "r+b") as handle:
+                    handle.truncate(reader.valid_end)
+                self._file_size = reader.valid_end
+
+    def _drain_dirty(self) -> List[str]:
+        dirty = []
+        while True:
+            try:
+                dirty.append(DIRTY_SESSIONS.pop())
+            except KeyError:
+                return dirty
+
+    def write(self) -> int:
+        """Persist sessions changed since the last call; returns records written."""
+        with self._lock:
+            dirty = self._drain_dirty()
+            if self._file_size == 0 or not os.path.exists(self.path):
+                return self._rewrite()
+
+            records = []
+            for session_id in dirty:
+                session = SESSION_STORE.get(session_id)
+                if session is None:
+                    continue
+                record = _record(session_id, encode_session(session))
+                self._live_bytes += len(record) - self._live.get(session_id, 0)
+                self._live[session_id] = len(record)
+                records.append(record)
+            if records:
+                with open(self.path, "ab") as handle:
+                    handle.write(b"".join(records))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                self._file_size += sum(len(record) for record in records)
+
+            if self._file_size > COMPACT_RATIO * self._live_bytes:
+                self._rewrite()
+            return len(records)
+
+    def _rewrite(self) -> int:
+        """Write every live session to a fresh file and swap it in atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        live: Dict[str, int] = {}
+        size = len(MAGIC)
+        # Copy both lists under the lock get_session takes, so a session being
+        # restored right now is in exactly one of them.
+        with SESSION_CREATE_LOCK:
+            sessions = list(SESSION_STORE.items())
+            pending = self.reader.pending() if self.reader is not None else []
+        with open(temp_path, "wb") as handle:
+            handle.write(MAGIC)
+            for session_id, session in sessions:
+                record = _record(session_id, encode_session(session))
+                handle.write(record)
+                live[session_id] = len(record)
+                size += len(record)
+            # Restored sessions nobody has touched yet are copied undecoded.
+            for session_id in pending:
+                if session_id in live:
+                    continue
+                payload = self.reader.payload(session_id)
+                if payload is None:
+                    # Taken since the copy above, so it is in the store now.
+                    session = SESSION_STORE.get(session_id)
+                    if session is None:
+                        continue
+                    payload = encode_session(session)
+                record = _record(session_id, payload)
+                handle.write(record)
+                live[session_id] = len(record)
+                size += len(record)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.path)
+        self._live = live
+        self._live_bytes = size
+        self._file_size = size
+        return len(live)
+
+
+def restore_sessions(path: str) -> Optional[SnapshotReader]:
+    """Map a snapshot and register it so get_session decodes sessions lazily."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        reader = SnapshotReader(path)
+    except (OSError, ValueError):
+        # Keep the file for inspection; the writer would otherwise replace it
+        # with the (empty) live store on its first run.
+        logger.exception("Moving unreadable session snapshot %s aside", path)
+        os.replace(path, path + ".bad")
+        return None
+    set_restore_source(reader)
+    logger.info("Restored %d sessions from %s", len(reader.index), path)
+    return reader
+
+
+def start_snapshotter(writer: SnapshotWriter, interval: float) -> threading.Event:
+    """Write snapshots every interval seconds until the returned event is set."""
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(interval):
+            try:
+                writer.write()
+            except OSError:
+                logger.exception("Failed to write session snapshot")
+
+    threading.Thread(target=run, name="session-snapshot", daemon=True).start()
+    return stop
@@ -0,0 +1,59 @@
+"""Check extract_intelligence against the golden corpus, then measure throughput.
+
+Run from the repository root:
+    python -m benchmarks.bench_intelligence
+"""
+
+import json
+import os
+import random
+import time
+
+from app.intelligence import extract_intelligence
+from app.memory import Message
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "intelligence_golden.json")
+DUMP_SIZES = (100, 1000, 10000)
+REPEATS = 5
+
+
+def _extract(texts):
+    store = {}
+    extract_intelligence([Message("scammer", text, 0) for text in texts], store)
+    return {key: sorted(values) for key, values in store.items() if values}
+
+
+def check_golden() -> int:
+    with open(GOLDEN_PATH, encoding="utf-8") as handle:
+        cases = json.load(handle)
+    for index, case in enumerate(cases):
+        actual = _extract(case["messages"])
+        if actual != case["expected"]:
+            raise SystemExit(f"golden case {index} differs:\nexpected {case['expected']}\nactual   {actual}")
+    return len(cases)
+
+
+def _sms_dump(lines: int) -> str:
+    """A forwarded SMS dump: mostly plain text with the occasional entity."""
+    rng = random.Random(lines)
+    with open(GOLDEN_PATH, encoding="utf-8") as handle:
+        samples = [text for case in json.load(handle) for text in case["messages"] if text]
+    filler = "Dear customer your request has been received and will be processed shortly."
+    return "\n".join(rng.choice(samples) if rng.random() < 0.3 else filler for _ in range(lines))
+
+
+def main() -> None:
+    print(f"golden corpus: {check_golden()} cases match")
+    print(f"{'sms lines':>9} {'chars':>10} {'ms/call':>9} {'MB/s':>7}")
+    for lines in DUMP_SIZES:
+        text = _sms_dump(lines)
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            _extract([text])
+            best = min(best, time.perf_counter() - start)
+        print(f"{lines:>9} {len(text):>10,} {best * 1000:>9.2f} {len(text) / best / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
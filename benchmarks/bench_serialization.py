@@ -0,0 +1,117 @@
+"""Compare CPU per /honeypot request and per dashboard list call, before and after the codec layer.
+
+"before" is the previous path: stdlib json plus a RequestSchema that validated
+every conversationHistory item, FastAPI's jsonable_encoder with stdlib json for
+responses, and stdlib json for DB blobs. "after" decodes with the codec, as
+CodecRoute does, and validates the current RequestSchema.
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+"""
+
+import json
+import time
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app import codec
+from app.memory import Message as SessionMessage
+from app.schemas import Message, Metadata, RequestSchema
+
+HISTORY_LENGTHS = (0, 20, 200)
+DASHBOARD_ROWS = 100
+MESSAGES_PER_ROW = 50
+ITERATIONS = 2000
+
+
+class PreviousRequestSchema(RequestSchema):
+    conversationHistory: List[Message]
+    metadata: Optional[Metadata]
+
+
+def _message(index: int) -> dict:
+    return {
+        "sender": "scammer" if index % 2 == 0 else "user",
+        "text": "Your SBI account will be blocked today. Verify KYC at http://sbi-kyc.xyz now",
+        "timestamp": 1700000000 + index,
+    }
+
+
+def _request_body(history: int) -> bytes:
+    return json.dumps(
+        {
+            "sessionId": "bench-session",
+            "message": _message(history),
+            "conversationHistory": [_message(index) for index in range(history)],
+            "metadata": {"channel": "SMS", "language": "English", "locale": "IN"},
+        }
+    ).encode("utf-8")
+
+
+def _request_before(body: bytes) -> bytes:
+    data = PreviousRequestSchema.model_validate(json.loads(body))
+    message = SessionMessage.from_dict(data.message.model_dump())
+    return json.dumps(jsonable_encoder({"status": "success", "reply": message.text})).encode("utf-8")
+
+
+def _request_after(body: bytes) -> bytes:
+    data = RequestSchema.model_validate(codec.loads(body))
+    message = SessionMessage(data.message.sender, data.message.text, data.message.timestamp)
+    return codec.dumps_bytes({"status": "success", "reply": message.text})
+
+
+def _dashboard_rows(dumps) -> list:
+    intelligence = {"phoneNumbers": ["+919876543210"], "suspiciousDomains": ["sbi-kyc.xyz"]}
+    messages = [_message(index) for index in range(MESSAGES_PER_ROW)]
+    return [
+        ("telegram:%d" % row, "2024-01-01T00:00:00Z", "2024-01-01T00:00:00Z", 1, MESSAGES_PER_ROW,
+         dumps(intelligence), "Signals observed: urgency.", dumps(messages))
+        for row in range(DASHBOARD_ROWS)
+    ]
+
+
+def _list_call(rows, loads, encode) -> bytes:
+    records = [
+        {
+            "sessionId": row[0],
+            "createdAt": row[1],
+            "updatedAt": row[2],
+            "scamDetected": bool(row[3]),
+            "totalMessagesExchanged": row[4],
+            "extractedIntelligence": loads(row[5]),
+            "agentNotes": row[6],
+            "rawMessages": loads(row[7]),
+        }
+        for row in rows
+    ]
+    return encode({"records": records})
+
+
+def _per_call_us(func, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main() -> None:
+    print(f"{'/honeypot request':<28} {'before us':>10} {'after us':>10}")
+    for history in HISTORY_LENGTHS:
+        body = _request_body(history)
+        before = _per_call_us(lambda: _request_before(body), ITERATIONS)
+        after = _per_call_us(lambda: _request_after(body), ITERATIONS)
+        print(f"{'history=%d' % history:<28} {before:>10.1f} {after:>10.1f}")
+
+    old_rows = _dashboard_rows(json.dumps)
+    new_rows = _dashboard_rows(codec.dumps)
+    before = _per_call_us(
+        lambda: _list_call(old_rows, json.loads, lambda obj: json.dumps(jsonable_encoder(obj)).encode("utf-8")),
+        ITERATIONS // 20,
+    )
+    after = _per_call_us(lambda: _list_call(new_rows, codec.loads, codec.dumps_bytes), ITERATIONS // 20)
+    label = f"dashboard list ({DASHBOARD_ROWS} rows)"
+    print(f"{label:<28} {before:>10.1f} {after:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Report bytes per live session for the legacy dict layout and the slotted Session.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_memory
+"""
+
+import json
+import random
+import tracemalloc
+
+from app.memory import INTELLIGENCE_KEYS, Message, Session
+
+MESSAGE_COUNTS = (10, 100, 1000)
+SESSIONS_PER_RUN = {10: 2000, 100: 200, 1000: 20}
+
+SAMPLE_TEXTS = (
+    "Your SBI account will be blocked today. Verify KYC at http://sbi-kyc.xyz now",
+    "Ji, thoda clear karoge?",
+    "Send OTP immediately to avoid suspension. Call 9876543210",
+    "Aapka official number aur reference ID bhej do.",
+    "Pay Rs 10 to verify@ybl to unlock your account",
+)
+
+
+def _incoming(index: int) -> dict:
+    # Decode from JSON so sender strings are fresh objects, as they are per request.
+    sender = "scammer" if index % 2 == 0 else "user"
+    raw = json.dumps({"sender": sender, "text": random.choice(SAMPLE_TEXTS), "timestamp": 1700000000 + index})
+    return json.loads(raw)
+
+
+def _legacy_session(message_count: int) -> dict:
+    session = {
+        "messages": [],
+        "responses": [],
+        "intelligence": {key: [] for key in INTELLIGENCE_KEYS},
+        "entitiesCollected": {key: 0 for key in INTELLIGENCE_KEYS},
+        "scamDetected": True,
+        "scamConfidence": 0.9,
+        "scamSignals": ["authority", "urgency", "verification"],
+        "conversationCount": message_count,
+        "startedAt": 1700000000,
+        "lastUpdatedAt": 1700000000,
+    }
+    for index in range(message_count):
+        session["messages"].append(_incoming(index))
+    session["intelligence"]["phoneNumbers"] = ["+919876543210"]
+    session["intelligence"]["upiIds"] = ["verify@ybl"]
+    session["intelligence"]["suspiciousKeywords"] = ["blocked", "otp", "verify"]
+    return session
+
+
+def _slotted_session(message_count: int) -> Session:
+    session = Session(1700000000)
+    for index in range(message_count):
+        session.messages.append(Message.from_dict(_incoming(index)))
+    session.scam_detected = True
+    session.scam_confidence = 0.9
+    session.add_signals(["authority", "urgency", "verification"])
+    session.conversation_count = message_count
+    session.intelligence["phoneNumbers"] = {"+919876543210"}
+    session.intelligence["upiIds"] = {"verify@ybl"}
+    session.intelligence["suspiciousKeywords"] = {"blocked", "otp", "verify"}
+    return session
+
+
+def _bytes_per_session(factory, message_count: int) -> float:
+    random.seed(0)
+    count = SESSIONS_PER_RUN[message_count]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [factory(message_count) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / count
+
+
+def main() -> None:
+    print(f"{'messages':>8} {'legacy B/session':>18} {'slotted B/session':>18} {'saved':>7}")
+    for message_count in MESSAGE_COUNTS:
+        legacy = _bytes_per_session(_legacy_session, message_count)
+        slotted = _bytes_per_session(_slotted_session, message_count)
+        saved = 100.0 * (legacy - slotted) / legacy
+        print(f"{message_count:>8} {legacy:>18,.0f} {slotted:>18,.0f} {saved:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure session snapshot cost and warm-restart time.
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshot
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from app import memory
+from app.memory import Message, Session
+from app.snapshot import SnapshotReader, SnapshotWriter
+
+SESSION_COUNT = 100_000
+MESSAGES_PER_SESSION = 10
+DIRTY_FRACTION = 0.01
+
+TEXTS = (
+    "Your SBI account will be blocked today. Verify KYC at http://sbi-kyc.xyz now",
+    "Ji, thoda clear karoge?",
+    "Send OTP immediately to avoid suspension. Call 9876543210",
+    "Aapka official number aur reference ID bhej do.",
+)
+
+
+def _populate() -> None:
+    rng = random.Random(0)
+    memory.SESSION_STORE.clear()
+    for index in range(SESSION_COUNT):
+        session = Session(1700000000)
+        for turn in range(MESSAGES_PER_SESSION):
+            sender = "scammer" if turn % 2 == 0 else "user"
+            session.messages.append(Message(sender, rng.choice(TEXTS), 1700000000 + turn))
+        session.responses = [message.text for message in session.messages if message.sender == "user"]
+        session.intelligence = {"phoneNumbers": {"+919876543210"}, "suspiciousDomains": {"sbi-kyc.xyz"}}
+        session.add_signals(["authority", "urgency"])
+        session.scam_confidence = 0.8
+        session.scam_detected = True
+        memory.SESSION_STORE[f"telegram:{index}"] = session
+
+
+def _timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    return result
+
+
+def main() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "sessions.snap")
+    _populate()
+    print(f"{SESSION_COUNT:,} sessions x {MESSAGES_PER_SESSION} messages")
+
+    writer = SnapshotWriter(path)
+    _timed("full snapshot", writer.write)
+    print(f"{'snapshot size':<34} {os.path.getsize(path) / 1e6:>9.1f} MB")
+
+    for session_id in random.Random(1).sample(list(memory.SESSION_STORE), int(SESSION_COUNT * DIRTY_FRACTION)):
+        memory.SESSION_STORE[session_id].messages.append(Message("scammer", "hello?", 1700000100))
+        memory.mark_dirty(session_id)
+    _timed(f"incremental snapshot ({DIRTY_FRACTION:.0%} dirty)", writer.write)
+
+    memory.SESSION_STORE.clear()
+    reader = _timed("restore (map + index)", lambda: SnapshotReader(path))
+    memory.set_restore_source(reader)
+    sample = random.Random(2).sample(list(reader.index), 1000)
+    _timed("first access of 1,000 sessions", lambda: [memory.get_session(session_id) for session_id in sample])
+    memory.set_restore_source(None)
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()